@@ -4,41 +4,258 @@ import json
 from datetime import datetime, timedelta
 import re
 import os
+import tempfile
+import sys
+import threading
+import time
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Turma padrão usa o arquivo original para manter compatibilidade
+DEFAULT_CLASS_ID = 'default'
+DATA_FILE = 'quiz_data.json'
+DATA_DIR = 'quiz_data'
+CLASS_QUERY_PARAM = 'turma'
+# Turmas aceitas além das que já têm arquivo em quiz_data/ (separadas por vírgula)
+CONFIGURED_CLASS_IDS = {
+    c.strip().lower()
+    for c in os.environ.get('QUIZ_CLASSES', '').split(',')
+    if c.strip()
+}
+# Limite de turmas mantidas em memória ao mesmo tempo
+MAX_CACHED_CLASSES = 100
+
+# Tempo sem interação (em minutos) para uma sessão ser considerada abandonada
+try:
+    SESSION_IDLE_TIMEOUT_MINUTES = int(os.environ.get('QUIZ_SESSION_TIMEOUT_MINUTES', '30'))
+except ValueError:
+    SESSION_IDLE_TIMEOUT_MINUTES = 30
+SESSION_IDLE_TIMEOUT_MINUTES = max(1, SESSION_IDLE_TIMEOUT_MINUTES)
+# Chaves de widgets do fluxo do participante
+QUIZ_WIDGET_KEYS = ('cpf_input', 'name_input')
 
 # Adicione estas funções logo após as imports
-def save_data_to_file():
-    """Salva dados em arquivo JSON"""
-    data = {
-        'questions': st.session_state.questions,
-        'responses': st.session_state.responses
-    }
-    
-    with open('quiz_data.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def get_class_id():
+    """Retorna o identificador da turma a partir do parâmetro ?turma= da URL.
+
+    Retorna None se a turma não existir.
+    """
+    class_id = st.query_params.get(CLASS_QUERY_PARAM, DEFAULT_CLASS_ID)
+    class_id = str(class_id).strip().lower()
+    if not re.fullmatch(r'[a-z0-9_-]+', class_id):
+        return None
+    if class_id == DEFAULT_CLASS_ID or class_id in CONFIGURED_CLASS_IDS:
+        return class_id
+    if os.path.exists(get_data_file(class_id)):
+        return class_id
+    return None
 
-def load_data_from_file():
-    """Carrega dados do arquivo JSON"""
-    if os.path.exists('quiz_data.json'):
+def get_data_file(class_id):
+    """Retorna o caminho do arquivo JSON de uma turma"""
+    if class_id == DEFAULT_CLASS_ID:
+        return DATA_FILE
+    return os.path.join(DATA_DIR, f"{class_id}.json")
+
+@st.cache_resource(max_entries=MAX_CACHED_CLASSES)
+def get_class_store(class_id):
+    """Carrega os dados de uma turma uma única vez por processo.
+
+    O dicionário retornado é compartilhado entre todas as sessões da mesma
+    turma, então cada sessão guarda apenas referências às listas. A lista de
+    perguntas nunca é alterada no lugar: edições criam uma nova lista, e quem
+    está no meio do quiz continua com a versão em que começou.
+    """
+    store = {
+        'questions': [],
+        'responses': [],
+        'lock': threading.RLock()
+    }
+    data_file = get_data_file(class_id)
+    if os.path.exists(data_file):
         try:
-            with open('quiz_data.json', 'r', encoding='utf-8') as f:
+            with open(data_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                st.session_state.questions = data.get('questions', [])
-                st.session_state.responses = data.get('responses', [])
+                store['questions'] = data.get('questions', [])
+                store['responses'] = data.get('responses', [])
         except:
             # Se houver erro, inicializa vazio
-            st.session_state.questions = []
-            st.session_state.responses = []
-    else:
-        st.session_state.questions = []
-        st.session_state.responses = []
+            pass
+    return store
+
+def get_current_store():
+    """Retorna os dados compartilhados da turma da sessão atual"""
+    return get_class_store(st.session_state.class_id)
+
+def save_data_to_file(store, class_id):
+    """Salva os dados de uma turma em arquivo JSON"""
+    data_file = get_data_file(class_id)
+    data_dir = os.path.dirname(data_file) or '.'
+    
+    with store['lock']:
+        data = {
+            'questions': store['questions'],
+            'responses': store['responses']
+        }
+        os.makedirs(data_dir, exist_ok=True)
+        # Grava em arquivo temporário para não corromper os dados se falhar no meio
+        fd, temp_file = tempfile.mkstemp(dir=data_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, data_file)
+        except:
+            os.remove(temp_file)
+            raise
+
+def update_questions(update):
+    """Substitui a lista de perguntas da turma e salva em um único passo"""
+    class_id = st.session_state.class_id
+    store = get_class_store(class_id)
+    with store['lock']:
+        store['questions'] = update(list(store['questions']))
+        save_data_to_file(store, class_id)
+
+def add_response(response):
+    """Registra uma resposta na turma e salva em um único passo"""
+    class_id = st.session_state.class_id
+    store = get_class_store(class_id)
+    with store['lock']:
+        store['responses'].append(response)
+        save_data_to_file(store, class_id)
+
+def bind_class_data():
+    """Vincula a sessão aos dados compartilhados da turma atual"""
+    store = get_current_store()
+    st.session_state.questions = store['questions']
+    st.session_state.responses = store['responses']
+
+@st.cache_resource
+def get_session_registry():
+    """Registro de sessões ativas, compartilhado por todo o processo"""
+    return {
+        'sessions': {},
+        'evicted': 0,
+        'lock': threading.Lock()
+    }
+
+def get_session_id():
+    """Retorna o identificador da sessão atual do Streamlit"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def get_object_size(obj, seen=None):
+    """Estima recursivamente o tamanho em bytes de um objeto"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(get_object_size(k, seen) + get_object_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(get_object_size(item, seen) for item in obj)
+    return size
+
+def estimate_session_memory():
+    """Estima a memória usada pelo estado próprio da sessão atual"""
+    # Objetos compartilhados com a turma são ignorados pela identidade, sem
+    # percorrê-los: as listas atuais da turma e, na tela de resultado, as
+    # respostas que já estão salvas na turma. Uma versão antiga das
+    # perguntas, mantida durante o quiz após uma edição, conta para a sessão.
+    store = get_current_store()
+    shared_ids = {id(store['questions']), id(store['responses'])}
+    if st.session_state.get('current_step') == 'result':
+        shared_ids.add(id(st.session_state.get('user_answers')))
+
+    return sum(
+        get_object_size(value)
+        for value in st.session_state.values()
+        if id(value) not in shared_ids
+    )
+
+def drop_quiz_widget_state():
+    """Remove do estado da sessão as chaves dos widgets do quiz"""
+    for key in list(st.session_state.keys()):
+        if key in QUIZ_WIDGET_KEYS or str(key).startswith('question_'):
+            del st.session_state[key]
+
+def evict_session_state():
+    """Descarta o estado pesado de uma sessão inativa"""
+    reset_quiz()
+    st.session_state.admin_authenticated = False
+    st.session_state.current_page = 'quiz'
+
+def close_idle_session(live, session_id):
+    """Encerra uma sessão do Streamlit, descartando todo o seu estado"""
+    # close_session só pode rodar na thread do event loop do Streamlit
+    live._get_async_objs().eventloop.call_soon_threadsafe(live.close_session, session_id)
+
+def track_session():
+    """Atualiza o registro de sessões e expira sessões inativas"""
+    session_id = get_session_id()
+    if session_id is None:
+        return
+
+    registry = get_session_registry()
+    now = time.time()
+    timeout = SESSION_IDLE_TIMEOUT_MINUTES * 60
+
+    # A própria sessão ficou inativa além do limite antes de ser encerrada:
+    # recomeça do zero
+    last_activity = st.session_state.get('last_activity')
+    expired = last_activity is not None and now - last_activity > timeout
+    if expired:
+        evict_session_state()
+        st.session_state.session_expired = True
+    st.session_state.last_activity = now
+
+    session_info = {
+        'class_id': st.session_state.class_id,
+        'step': st.session_state.current_step,
+        'page': st.session_state.current_page,
+        'last_activity': now,
+        'memory': estimate_session_memory()
+    }
+
+    with registry['lock']:
+        if expired:
+            registry['evicted'] += 1
+
+        # Abas já fechadas foram liberadas pelo Streamlit e saem do registro;
+        # abas inativas além do limite são encerradas junto com seu estado
+        if runtime.exists():
+            live = runtime.get_instance()
+            for other_id, info in list(registry['sessions'].items()):
+                if other_id == session_id:
+                    continue
+                if not live.is_active_session(other_id):
+                    del registry['sessions'][other_id]
+                elif now - info['last_activity'] > timeout:
+                    close_idle_session(live, other_id)
+                    del registry['sessions'][other_id]
+                    registry['evicted'] += 1
+
+        registry['sessions'][session_id] = session_info
 
-# MODIFIQUE a função init_session_state():
 def init_session_state():
     """Inicializa variáveis de sessão"""
-    # Carregar dados salvos primeiro
-    if 'data_loaded' not in st.session_state:
-        load_data_from_file()
-        st.session_state.data_loaded = True
+    class_id = get_class_id()
+    if class_id is None:
+        st.error("❌ Turma não encontrada! Verifique o link recebido.")
+        st.stop()
+    
+    # Trocar de turma reinicia o quiz e o login administrativo
+    if st.session_state.get('class_id') != class_id:
+        st.session_state.class_id = class_id
+        reset_quiz()
+        st.session_state.admin_authenticated = False
+    
+    # Fora do quiz a sessão acompanha a versão atual das perguntas; durante
+    # o quiz mantém a lista com que começou
+    if st.session_state.get('current_step') != 'quiz':
+        bind_class_data()
     
     # Inicializar outras variáveis (mantém o código original)
     if 'current_user_cpf' not in st.session_state:
@@ -63,9 +280,18 @@ st.set_page_config(
     layout="wide"
 )
 
-# Senha do administrador
+# Senha do administrador (padrão para turmas sem senha própria)
 ADMIN_PASSWORD = "admin123"
 
+def get_admin_password(class_id):
+    """Retorna a senha do administrador de uma turma.
+
+    Cada turma pode ter sua senha em QUIZ_ADMIN_PASSWORD_<TURMA>; turmas sem
+    essa variável compartilham a senha padrão.
+    """
+    env_name = f"QUIZ_ADMIN_PASSWORD_{class_id.upper().replace('-', '_')}"
+    return os.environ.get(env_name, ADMIN_PASSWORD)
+
 # Funções auxiliares
 def validate_cpf(cpf):
     """Valida CPF brasileiro"""
@@ -105,27 +331,6 @@ def get_week_start():
     week_start = today - timedelta(days=days_since_sunday)
     return week_start.replace(hour=0, minute=0, second=0, microsecond=0)
 
-def init_session_state():
-    """Inicializa variáveis de sessão"""
-    if 'questions' not in st.session_state:
-        st.session_state.questions = []
-    if 'responses' not in st.session_state:
-        st.session_state.responses = []
-    if 'current_user_cpf' not in st.session_state:
-        st.session_state.current_user_cpf = None
-    if 'current_user_name' not in st.session_state:
-        st.session_state.current_user_name = None
-    if 'current_step' not in st.session_state:
-        st.session_state.current_step = 'cpf'  # cpf -> name -> quiz -> result
-    if 'current_question_index' not in st.session_state:
-        st.session_state.current_question_index = 0
-    if 'user_answers' not in st.session_state:
-        st.session_state.user_answers = []
-    if 'admin_authenticated' not in st.session_state:
-        st.session_state.admin_authenticated = False
-    if 'current_page' not in st.session_state:
-        st.session_state.current_page = 'quiz'
-
 def reset_quiz():
     """Reseta o quiz para o início"""
     st.session_state.current_user_cpf = None
@@ -133,11 +338,15 @@ def reset_quiz():
     st.session_state.current_step = 'cpf'
     st.session_state.current_question_index = 0
     st.session_state.user_answers = []
+    drop_quiz_widget_state()
 
 # Interface para usuários
 def user_interface():
     st.title("❓ Quiz Semanal")
     
+    if st.session_state.pop('session_expired', False):
+        st.info("⏱️ Sua sessão expirou por inatividade. Comece novamente.")
+    
     if st.session_state.current_step == 'cpf':
         show_cpf_step()
     elif st.session_state.current_step == 'name':
@@ -309,10 +518,12 @@ def save_final_response():
         'timestamp': datetime.now().isoformat()
     }
     
-    st.session_state.responses.append(final_response)
-    
     # Salva automaticamente no arquivo
-    save_data_to_file()
+    add_response(final_response)
+    
+    # As respostas agora vivem nos dados da turma; a sessão só mantém a
+    # referência usada na tela de resultado e descarta os widgets do quiz
+    drop_quiz_widget_state()
 
 def show_result_step():
     st.subheader("🎯 Resultado do Quiz")
@@ -378,7 +589,7 @@ def admin_interface():
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             if st.button("Entrar", type="primary", use_container_width=True):
-                if password == ADMIN_PASSWORD:
+                if password == get_admin_password(st.session_state.class_id):
                     st.session_state.admin_authenticated = True
                     st.rerun()
                 else:
@@ -388,7 +599,7 @@ def admin_interface():
 
 def admin_panel():
     # Abas do painel admin
-    tab1, tab2 = st.tabs(["📝 Gerenciar Perguntas", "📊 Ver Respostas"])
+    tab1, tab2, tab3 = st.tabs(["📝 Gerenciar Perguntas", "📊 Ver Respostas", "🖥️ Sessões"])
     
     with tab1:
         manage_questions()
@@ -396,6 +607,9 @@ def admin_panel():
     with tab2:
         view_responses()
     
+    with tab3:
+        view_sessions()
+    
     # Botão de logout
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -428,7 +642,6 @@ def manage_questions():
         if submitted:
             if question_text and all([option1, option2, option3, option4]) and feedback:
                 new_question = {
-                    'id': len(st.session_state.questions) + 1,
                     'question': question_text,
                     'options': [option1, option2, option3, option4],
                     'correct_answer': correct_answer,
@@ -436,18 +649,22 @@ def manage_questions():
                     'created_at': datetime.now().isoformat()
                 }
                 
-                st.session_state.questions.append(new_question)
-                save_data_to_file()
-                st.success(f"✅ Pergunta {len(st.session_state.questions)} adicionada com sucesso!")
+                def append_question(current):
+                    current.append({'id': len(current) + 1, **new_question})
+                    return current
+                
+                update_questions(append_question)
+                st.success(f"✅ Pergunta {len(get_current_store()['questions'])} adicionada com sucesso!")
                 st.rerun()
             else:
                 st.error("❌ Por favor, preencha todos os campos!")
     
-    # Lista de perguntas existentes
-    st.subheader(f"📋 Perguntas Existentes ({len(st.session_state.questions)})")
+    # Lista de perguntas existentes (sempre a versão atual da turma)
+    questions = get_current_store()['questions']
+    st.subheader(f"📋 Perguntas Existentes ({len(questions)})")
     
-    if st.session_state.questions:
-        for i, q in enumerate(st.session_state.questions):
+    if questions:
+        for i, q in enumerate(questions):
             with st.expander(f"Pergunta {i + 1}: {q['question'][:50]}..."):
                 st.write(f"**Pergunta:** {q['question']}")
                 st.write("**Opções:**")
@@ -460,15 +677,18 @@ def manage_questions():
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button(f"🗑️ Excluir", key=f"delete_{i}", type="secondary"):
-                        st.session_state.questions.pop(i)
-                        save_data_to_file() 
+                        update_questions(lambda current: current[:i] + current[i + 1:])
                         st.success(f"Pergunta {i + 1} excluída!")
                         st.rerun()
                 
                 with col2:
                     if st.button(f"⬆️ Mover para cima", key=f"up_{i}", disabled=(i == 0)):
                         if i > 0:
-                            st.session_state.questions[i], st.session_state.questions[i-1] = st.session_state.questions[i-1], st.session_state.questions[i]
+                            def move_up(current):
+                                current[i], current[i-1] = current[i-1], current[i]
+                                return current
+                            
+                            update_questions(move_up)
                             st.rerun()
     else:
         st.info("📝 Nenhuma pergunta cadastrada ainda. Adicione a primeira pergunta acima!")
@@ -659,12 +879,57 @@ def view_responses():
                 st.write(f"**Pontuação:** {response['correct_answers']}/{response['total_questions']} ({response['score_percentage']:.1f}%)")
                 st.write(f"**Data:** {datetime.fromisoformat(response['timestamp']).strftime('%d/%m/%Y %H:%M')}")
 
+def view_sessions():
+    st.subheader("🖥️ Sessões Ativas")
+    
+    registry = get_session_registry()
+    now = time.time()
+    with registry['lock']:
+        sessions = dict(registry['sessions'])
+        evicted = registry['evicted']
+    
+    total_memory = sum(info['memory'] for info in sessions.values())
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Sessões Ativas", len(sessions))
+    col2.metric("Memória Estimada", f"{total_memory / 1024:.1f} KB")
+    col3.metric("Sessões Expiradas", evicted)
+    col4.metric("Tempo Limite", f"{SESSION_IDLE_TIMEOUT_MINUTES} min")
+    
+    if not sessions:
+        st.info("📋 Nenhuma sessão aberta no momento.")
+        return
+    
+    sessions_df = pd.DataFrame([
+        {
+            'Sessão': session_id[:8],
+            'Turma': info['class_id'],
+            'Página': info['page'],
+            'Etapa': info['step'],
+            'Inativa há (min)': round((now - info['last_activity']) / 60, 1),
+            'Memória (KB)': round(info['memory'] / 1024, 1)
+        }
+        for session_id, info in sessions.items()
+    ])
+    
+    st.subheader("📊 Sessões por Turma")
+    class_summary = sessions_df.groupby('Turma').agg(
+        Sessoes=('Sessão', 'count'),
+        Memoria_KB=('Memória (KB)', 'sum')
+    ).reset_index()
+    st.dataframe(class_summary, use_container_width=True, hide_index=True)
+    
+    st.subheader("📋 Lista de Sessões")
+    st.dataframe(sessions_df, use_container_width=True, hide_index=True)
+
 # Aplicação principal
 def main():
     init_session_state()
+    track_session()
     
     # Sidebar para navegação
     st.sidebar.title("🧭 Navegação")
+    st.sidebar.write(f"**Turma:** {st.session_state.class_id}")
     st.sidebar.write(f"**Total de Perguntas:** {len(st.session_state.questions)}")
     st.sidebar.write(f"**Total de Respostas:** {len(st.session_state.responses)}")
     
@@ -1,3 +1,3 @@
 
-streamlit>=1.28.0
+streamlit>=1.30.0
 pandas>=1.5.0